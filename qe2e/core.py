@@ -1,28 +1,81 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod, abstractproperty
 import argparse
-from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from enum import Enum, auto
 import glob
-import functools
-import json
 import os
+import shlex
 import subprocess
 import sys
-from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
-
-from bs4 import BeautifulSoup  # type: ignore
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
+
+from lxml import etree  # type: ignore
 import requests
 
+# orjson parses in C, a 2-5x win on suite loading; fall back to the
+# stdlib (which also accepts bytes) when it is not installed.
+_json_loads: Callable[[bytes], Any]
+try:
+    import orjson  # type: ignore
+
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+
+    _json_loads = json.loads
 
-@dataclass
+
+@dataclass(slots=True)
 class RunError:
     case: str
     step: int
     details: Optional[Any] = None
 
 
-RunState = Dict[Any, Any]
+@dataclass(slots=True)
+class RunState:
+    """
+    State threaded through the steps of a run: per-step success flags
+    in a list indexed by step, response payloads in a dict keyed by
+    response name, and the requests.Session shared by the HTTP steps.
+
+    Keeping the integer-indexed and string-keyed records in separate
+    homogeneous stores makes step bookkeeping a plain list store and
+    keeps the response dict string-only.
+    """
+
+    step_ok: List[bool] = field(default_factory=list)
+    responses: Dict[str, Any] = field(default_factory=dict)
+    session: Optional[requests.Session] = field(default=None, repr=False, compare=False)
+    pending_parses: List[Tuple[Dict[str, Any], Future]] = field(
+        default_factory=list, repr=False, compare=False
+    )
+
+    def mark_ok(self, index: int) -> None:
+        if index >= len(self.step_ok):
+            self.step_ok.extend([False] * (index + 1 - len(self.step_ok)))
+        self.step_ok[index] = True
+
+    def resolve_parses(self) -> None:
+        while self.pending_parses:
+            (record, future) = self.pending_parses.pop()
+            record["html"] = future.result()
+
+
 RunResult = Union[RunError, RunState]
 
 
@@ -53,28 +106,148 @@ class LookupError(Exception):
         return f"Could not find data at path '{self.path}'"
 
 
-def lookup_path(path: str, dict_: Union[Any, Dict[str, Any]]) -> Any:
+def lookup_path(
+    path: Union[str, Tuple[str, ...]], dict_: Union[Any, Dict[str, Any]]
+) -> Any:
     """
-    Recursively traverse a potentially nested dictionary
-    using the '.' separated path.
+    Traverse a potentially nested dictionary using the '.' separated
+    path, given either as a string or as a pre-split tuple of keys.
 
     >>> lookup_path("k0.k1.k2", {"k0": {"k1": {"k2": 42}}})
     42
     """
+    parts = path.split(".") if isinstance(path, str) else path
+    data = dict_
+    for part in parts:
+        try:
+            data = data[part]
+        except KeyError:
+            raise LookupError(part)
+    return data
 
-    def _lookup(p: List[str], data: Union[Any, Dict[str, Any]]) -> Any:
-        if not p:
-            return data
-        else:
-            try:
-                return _lookup(p[1:], data[p[0]])
-            except KeyError:
-                raise LookupError(p[0])
 
-    return _lookup(path.split("."), dict_)
+# One compiled getter per unique path string, shared by every assert
+# step that uses that path.
+_GETTER_CACHE: Dict[str, Callable[[Any], Any]] = {}
+
+
+def _compile_path(path: str) -> Callable[[Any], Any]:
+    """
+    Compile a '.' separated path into a generated function performing
+    the nested lookups as straight-line subscripts, so evaluating an
+    assert step does no string work or looping at all.
+
+    Identifier-like keys are interned by the bytecode compiler, so the
+    generated subscripts keep the cached-hash, identity-comparison
+    fast path against the interned response names.
+    """
+    getter = _GETTER_CACHE.get(path)
+    if getter is None:
+        body = "data" + "".join(f"[{part!r}]" for part in path.split("."))
+        source = (
+            "def getter(data):\n"
+            "    try:\n"
+            f"        return {body}\n"
+            "    except KeyError as e:\n"
+            "        raise LookupError(e.args[0])\n"
+        )
+        namespace: Dict[str, Any] = {"LookupError": LookupError}
+        exec(source, namespace)
+        getter = _GETTER_CACHE[path] = namespace["getter"]
+    return getter
+
+
+# Shared frozen record for responses whose html is never read; every
+# such response points at this one mapping instead of allocating its
+# own.
+_EMPTY_HTML: Mapping[str, Any] = MappingProxyType({"title": None, "content": None})
+
+
+class _TextCollector:
+    """
+    lxml parser target accumulating the page title and every text node
+    (tails included) in document order, without building a tree.
+    """
+
+    __slots__ = ("title_parts", "texts", "in_title", "title_done", "need_content")
+
+    def __init__(self, need_content: bool) -> None:
+        self.title_parts: List[str] = []
+        self.texts: List[str] = []
+        self.in_title = False
+        self.title_done = False
+        self.need_content = need_content
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        if tag == "title" and not self.title_done:
+            self.in_title = True
+
+    def end(self, tag: str) -> None:
+        if tag == "title" and self.in_title:
+            self.in_title = False
+            self.title_done = True
+
+    def data(self, text: str) -> None:
+        if self.in_title:
+            self.title_parts.append(text)
+        if self.need_content:
+            self.texts.append(text)
+
+    def close(self) -> None:
+        return None
+
+
+def _extract_html(
+    response: Any, need_title: bool = True, need_content: bool = True
+) -> Mapping[str, Any]:
+    """
+    Stream a response body through lxml, collecting the page title and
+    the document-order text via a parser target, so no document tree
+    is ever built and `content` reads exactly as the page text does.
+
+    Fields no later step asserts against are skipped; when neither is
+    needed the body is drained unparsed to keep the connection
+    reusable.
+    """
+    if not (need_title or need_content):
+        for chunk in response.iter_content(8192):
+            pass
+        return _EMPTY_HTML
+
+    collector = _TextCollector(need_content)
+    parser = etree.HTMLParser(target=collector)
+    for chunk in response.iter_content(8192):
+        parser.feed(chunk)
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:
+        pass
+    title = "".join(collector.title_parts) if collector.title_done else None
+    return {
+        "title": title,
+        "content": "".join(collector.texts) if need_content else None,
+    }
+
 
+# Shared pool the HTTP steps hand parse jobs to, so fetching the next
+# response overlaps with parsing the previous one; lxml releases the
+# GIL while parsing.
+_PARSE_POOL = ThreadPoolExecutor(max_workers=os.cpu_count())
 
-@dataclass
+
+def _field_referenced(refs: List[str], response_name: str, field_name: str) -> bool:
+    """
+    Whether any assert path reads `field_name` of the named response's
+    html record, directly or via a broader prefix.
+    """
+    whole = (response_name, f"{response_name}.html")
+    exact = f"{response_name}.html.{field_name}"
+    return any(
+        ref in whole or ref == exact or ref.startswith(exact + ".") for ref in refs
+    )
+
+
+@dataclass(slots=True)
 class Case:
     name: str
     tags: List[str]
@@ -82,35 +255,132 @@ class Case:
 
     @staticmethod
     def from_file(path: str) -> Case:
-        with open(path, "r") as fin:
-            return Case.from_dict(json.loads(fin.read()))
+        with open(path, "rb") as fin:
+            return Case.from_dict(_json_loads(fin.read()))
 
     @staticmethod
     def from_dict(dict_: Dict[Any, Any]) -> Case:
         name = dict_["name"]
         tags = dict_.get("tags", [])
-        steps = dict_.get("steps", [])
+        steps = list(map(Step.from_dict, dict_.get("steps", [])))
+
+        # Only extract the html fields some later assert actually
+        # reads; suites that just check status codes skip parsing.
+        refs = [
+            ref
+            for step in steps
+            for ref in (getattr(step, "actual", None), getattr(step, "container", None))
+            if ref is not None
+        ]
+        for step in steps:
+            if isinstance(step, UrlStep):
+                step._need_title = _field_referenced(refs, step.response_name, "title")
+                step._need_content = _field_referenced(
+                    refs, step.response_name, "content"
+                )
 
         return Case(
             name=name,
             tags=tags,
-            steps=list(map(Step.from_dict, steps)),
+            steps=steps,
         )
 
+    def _independent_run(self, index: int) -> List[Step]:
+        """
+        The longest run of adjacent steps starting at `index` that can
+        be evaluated concurrently: independent steps (those that only
+        write their own response) with no duplicated response names.
+        """
+        first = self.steps[index]
+        batch: List[Step] = [first]
+        if isinstance(first, UrlStep) and first.independent:
+            names = {first.response_name}
+            for step in self.steps[index + 1 :]:
+                if (
+                    not isinstance(step, UrlStep)
+                    or not step.independent
+                    or step.response_name in names
+                ):
+                    break
+                batch.append(step)
+                names.add(step.response_name)
+        return batch
+
     def evaluate(self, state_opt: Optional[RunState] = None) -> RunResult:
-        state: RunResult = state_opt or dict()
+        """
+        Run the steps in order, threading the run state through each.
+        Adjacent independent HTTP steps are evaluated concurrently so
+        their network latencies overlap rather than add up.
+
+        Steps update the state in place rather than copying it, so a
+        `state_opt` passed in here is consumed by the run.
+        """
+        state: RunState = state_opt or RunState()
+        if len(state.step_ok) < len(self.steps):
+            state.step_ok.extend([False] * (len(self.steps) - len(state.step_ok)))
+
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        state.session = session
+        try:
+            index = 0
+            while index < len(self.steps):
+                batch = self._independent_run(index)
+                if len(batch) > 1:
+                    with ThreadPoolExecutor(max_workers=len(batch)) as executor:
+                        futures = [
+                            executor.submit(step.evaluate, index + offset, state)
+                            for (offset, step) in enumerate(batch)
+                        ]
+                        for future in futures:
+                            result = future.result()
+                            if type(result) is RunError:
+                                return result
+                else:
+                    result = batch[0].evaluate(index, state)
+                    if type(result) is RunError:
+                        return result
+                    # On success, result is the same RunState the step
+                    # was handed; steps mutate it in place.
+                index += len(batch)
+            # Drain parse jobs while the session's sockets are still
+            # open; workers may still be streaming response bodies.
+            state.resolve_parses()
+        finally:
+            session.close()
+        state.session = None
+        return state
 
-        def reduce_step(acc: RunResult, indexed_step: Tuple[int, Step]) -> RunResult:
-            if isinstance(acc, RunError):
-                return acc
-            else:
-                (index, step) = indexed_step
-                return step.evaluate(index, acc)
 
-        return functools.reduce(reduce_step, enumerate(self.steps), state)
+# Maps Step.tag() to the Step subclass, populated as subclasses are
+# defined so from_dict dispatch is a single dict lookup.
+_STEP_REGISTRY: Dict[str, Type[Step]] = {}
 
 
 class Step(ABC):
+    # Slotted subclasses only stay dict-free if the base class also
+    # declares empty slots.
+    __slots__ = ()
+
+    # Whether the step neither reads prior run state nor writes
+    # anything but its own response, making it safe to evaluate
+    # concurrently with adjacent steps that share that property. Only
+    # safe HTTP methods qualify: POST/PATCH mutate server state (think
+    # login before fetching a protected page), so they must not be
+    # reordered against their neighbours. Overlapping steps also share
+    # the Session, which is not documented thread-safe; read-only GETs
+    # are the accepted-practice exception.
+    independent = False
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # Intermediate bases that leave tag() abstract are not
+        # loadable step types and stay out of the registry.
+        if not getattr(cls.tag, "__isabstractmethod__", False):
+            _STEP_REGISTRY[cls.tag()] = cls
+
     @classmethod
     @abstractmethod
     def tag(cls) -> str:
@@ -120,24 +390,40 @@ class Step(ABC):
     def evaluate(self, index: int, state: RunState) -> RunResult:
         pass
 
-    @staticmethod
-    def subclass_dict() -> Dict[str, Any]:
-        return {cls.tag(): cls for cls in Step.__subclasses__()}
-
     @classmethod
     @abstractmethod
     def from_dict(cls, dict_: Dict[Any, Any]) -> Step:
         type_ = dict_.pop("type", None)
-        subclass_dict = Step.subclass_dict()
-        if type_ in subclass_dict:
-            return subclass_dict[type_].from_dict(dict_)
+        if type_ in _STEP_REGISTRY:
+            return _STEP_REGISTRY[type_].from_dict(dict_)
         else:
             raise Exception(f"Unknown step type - {type_}")
 
 
-@dataclass
+@dataclass(slots=True)
+class UrlStep(Step):
+    """
+    Shared shape of the HTTP steps: a named response slot in the run
+    state plus the flags recording which html fields later asserts
+    actually read.
+    """
+
+    response_name: str
+    url: str
+    _need_title: bool = field(default=True, init=False, repr=False, compare=False)
+    _need_content: bool = field(default=True, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.response_name = sys.intern(self.response_name)
+
+
+@dataclass(slots=True)
 class Exec(Step):
     command: str
+    _argv: List[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._argv = shlex.split(self.command)
 
     @classmethod
     def tag(cls) -> str:
@@ -149,24 +435,20 @@ class Exec(Step):
 
     def evaluate(self, index: int, state: RunState) -> RunResult:
         try:
-            subprocess.call(self.command.split(), check=True)
-        except subprocess.CalledProcessError as e:
+            subprocess.run(self._argv, check=True)
+        except (subprocess.CalledProcessError, OSError) as e:
             return RunError(
                 case=self.tag(),
                 step=index,
                 details=e,
             )
-        finally:
-            return {
-                **state,
-                index: {"success": True},
-            }
+        state.mark_ok(index)
+        return state
 
 
-@dataclass
-class GetUrl(Step):
-    response_name: str
-    url: str
+@dataclass(slots=True)
+class GetUrl(UrlStep):
+    independent = True
 
     @classmethod
     def tag(cls) -> str:
@@ -177,26 +459,24 @@ class GetUrl(Step):
         return cls(**dict_)
 
     def evaluate(self, index: int, state: RunState) -> RunResult:
-        response = requests.get(self.url)
-        soup = BeautifulSoup(response.content, "html.parser")
-        return {
-            **state,
-            index: {"success": True},
-            self.response_name: {
-                "status_code": response.status_code,
-                "html": {
-                    "title": soup.title.get_text() if soup.title else None,
-                    "content": soup.get_text(),
-                },
-            },
-        }
+        response = (state.session or requests).get(self.url)
+        state.mark_ok(index)
+        record: Dict[str, Any] = {"status_code": response.status_code, "html": None}
+        state.responses[self.response_name] = record
+        state.pending_parses.append(
+            (
+                record,
+                _PARSE_POOL.submit(
+                    _extract_html, response, self._need_title, self._need_content
+                ),
+            )
+        )
+        return state
 
 
-@dataclass
-class PostUrl(Step):
+@dataclass(slots=True)
+class PostUrl(UrlStep):
     body: Any
-    response_name: str
-    url: str
 
     @classmethod
     def tag(cls) -> str:
@@ -207,26 +487,24 @@ class PostUrl(Step):
         return cls(**dict_)
 
     def evaluate(self, index: int, state: RunState) -> RunResult:
-        response = requests.post(self.url, self.body)
-        soup = BeautifulSoup(response.content, "html.parser")
-        return {
-            **state,
-            index: {"success": True},
-            self.response_name: {
-                "status_code": response.status_code,
-                "html": {
-                    "title": soup.title,
-                    "content": soup.get_text(),
-                },
-            },
-        }
+        response = (state.session or requests).post(self.url, self.body)
+        state.mark_ok(index)
+        record: Dict[str, Any] = {"status_code": response.status_code, "html": None}
+        state.responses[self.response_name] = record
+        state.pending_parses.append(
+            (
+                record,
+                _PARSE_POOL.submit(
+                    _extract_html, response, self._need_title, self._need_content
+                ),
+            )
+        )
+        return state
 
 
-@dataclass
-class PatchUrl(Step):
+@dataclass(slots=True)
+class PatchUrl(UrlStep):
     body: Any
-    response_name: str
-    url: str
 
     @classmethod
     def tag(cls) -> str:
@@ -237,26 +515,30 @@ class PatchUrl(Step):
         return cls(**dict_)
 
     def evaluate(self, index: int, state: RunState) -> RunResult:
-        response = requests.patch(self.url, self.body)
-        soup = BeautifulSoup(response.content, "html.parser")
-        return {
-            **state,
-            index: {"success": True},
-            self.response_name: {
-                "status_code": response.status_code,
-                "html": {
-                    "title": soup.title,
-                    "content": soup.get_text(),
-                },
-            },
-        }
+        response = (state.session or requests).patch(self.url, self.body)
+        state.mark_ok(index)
+        record: Dict[str, Any] = {"status_code": response.status_code, "html": None}
+        state.responses[self.response_name] = record
+        state.pending_parses.append(
+            (
+                record,
+                _PARSE_POOL.submit(
+                    _extract_html, response, self._need_title, self._need_content
+                ),
+            )
+        )
+        return state
 
 
-@dataclass
+@dataclass(slots=True)
 class AssertEq(Step):
     actual: str
     expected: Any
     invert: Optional[bool] = False
+    _lookup_actual: Callable[[Any], Any] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._lookup_actual = _compile_path(self.actual)
 
     @classmethod
     def tag(cls) -> str:
@@ -267,8 +549,9 @@ class AssertEq(Step):
         return cls(**dict_)
 
     def evaluate(self, index: int, state: RunState) -> RunResult:
+        state.resolve_parses()
         try:
-            actual = lookup_path(self.actual, state)
+            actual = self._lookup_actual(state.responses)
         except LookupError as e:
             return RunError(
                 case=self.tag(),
@@ -276,7 +559,8 @@ class AssertEq(Step):
                 details=f"Could not find data at path '{self.actual}'",
             )
         if actual == self.expected or self.invert:
-            return {**state, index: {"success": True}}
+            state.mark_ok(index)
+            return state
         else:
             return RunError(
                 case=self.tag(),
@@ -291,11 +575,17 @@ class AssertEq(Step):
             )
 
 
-@dataclass
+@dataclass(slots=True)
 class AssertContains(Step):
     container: str
     content: str
     invert: Optional[bool] = False
+    _lookup_container: Callable[[Any], Any] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        self._lookup_container = _compile_path(self.container)
 
     @classmethod
     def tag(cls) -> str:
@@ -306,7 +596,8 @@ class AssertContains(Step):
         return cls(**dict_)
 
     def evaluate(self, index: int, state: RunState) -> RunResult:
-        container = lookup_path(self.container, state)
+        state.resolve_parses()
+        container = self._lookup_container(state.responses)
 
         content_present = self.content in container
 
@@ -323,12 +614,19 @@ class AssertContains(Step):
                 },
             )
         else:
-            return {**state, index: {"success": True}}
+            state.mark_ok(index)
+            return state
 
 
 def main():
     parser = argparse.ArgumentParser(description="Runner for Quick End 2 End Tests")
     parser.add_argument("test_path", type=str, help="Path to test file")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of cases to run concurrently (defaults to one per case, capped at 32)",
+    )
     args = parser.parse_args()
 
     if os.path.isdir(args.test_path):
@@ -338,9 +636,16 @@ def main():
     else:
         cases = [(args.test_path, Case.from_file(args.test_path))]
 
-    for (path, case) in cases:
-        (success, results) = display_results(case.evaluate())
-        print(f"{path} - {results}")
+    # Cases are independent and spend most of their time blocked on
+    # network I/O, so run them concurrently; map preserves input order.
+    workers = args.workers or min(32, max(1, len(cases)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        evaluated = executor.map(
+            lambda case: case.evaluate(), [case for (_, case) in cases]
+        )
+        for ((path, _), result) in zip(cases, evaluated):
+            (success, results) = display_results(result)
+            print(f"{path} - {results}")
 
 
 if __name__ == "__main__":
@@ -32,40 +32,39 @@ class TestCase(unittest.TestCase):
             ],
         )
 
-    @mock.patch.object(requests, "get")
+    @mock.patch.object(requests.Session, "get")
     def test_execute(self, mock_get):
-        mock_get.return_value = mock.Mock(
-            status_code=200,
-            content="""
+        html = """
             <html>
                 <title>Login to continue</title>
                 <body>
                     You really want to login
                 </body>
             </html>
-            """,
+            """
+        mock_get.return_value = mock.Mock(
+            status_code=200,
+            iter_content=lambda chunk_size: iter([html]),
         )
-        expected_run_state: RunState = {
-            0: {"success": True},
-            1: {"success": True},
-            2: {"success": True},
-            3: {"success": True},
-            4: {"success": True},
-            "login_response": {
-                "html": {
-                    "content": "\n"
-                    "\n"
-                    "Login to continue\n"
-                    "\n"
-                    "                    You really want "
-                    "to login\n"
-                    "                \n"
-                    "\n",
-                    "title": "Login to continue",
+        expected_run_state = RunState(
+            step_ok=[True, True, True, True, True],
+            responses={
+                "login_response": {
+                    "html": {
+                        "content": "\n"
+                        "                Login to continue\n"
+                        "                \n"
+                        "                    You really want "
+                        "to login\n"
+                        "                \n"
+                        "            \n"
+                        "            ",
+                        "title": "Login to continue",
+                    },
+                    "status_code": 200,
                 },
-                "status_code": 200,
             },
-        }
+        )
         actual_run_result = self.case.evaluate()
         assert actual_run_result == expected_run_state
 
@@ -102,3 +101,23 @@ class TestCase(unittest.TestCase):
         }
         actual_case = Case.from_dict(json)
         assert actual_case == self.case
+
+    @mock.patch.object(requests.Session, "get")
+    def test_adjacent_gets_overlap(self, mock_get):
+        mock_get.return_value = mock.Mock(
+            status_code=200,
+            iter_content=lambda chunk_size: iter(["<html></html>"]),
+        )
+        case = Case(
+            name="Two pages",
+            tags=[],
+            steps=[
+                GetUrl(response_name="first", url="localhost:8000/first"),
+                GetUrl(response_name="second", url="localhost:8000/second"),
+                AssertEq(actual="first.status_code", expected=200),
+                AssertEq(actual="second.status_code", expected=200),
+            ],
+        )
+        assert case._independent_run(0) == case.steps[:2]
+        result = case.evaluate()
+        assert result.step_ok == [True, True, True, True]
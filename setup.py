@@ -2,7 +2,6 @@
 import multiprocessing
 
 assert multiprocessing
-import re
 from setuptools import setup, find_packages
 
 
@@ -10,14 +9,9 @@ def get_version():
     """
     Extracts the version number from the version.py file.
     """
-    VERSION_FILE = "qe2e/version.py"
-    mo = re.search(
-        r'^__version__ = [\'"]([^\'"]*)[\'"]', open(VERSION_FILE, "rt").read(), re.M
-    )
-    if mo:
-        return mo.group(1)
-    else:
-        raise RuntimeError("Unable to find version string in {0}.".format(VERSION_FILE))
+    version_ns = {}
+    exec(open("qe2e/version.py", "rt").read(), version_ns)
+    return version_ns["__version__"]
 
 
 with open("requirements.txt") as fin:
@@ -49,10 +43,10 @@ setup(
     author_email="joshmarlow@gmail.com",
     keywords="",
     packages=find_packages(),
+    python_requires=">=3.10",
     classifiers=[
-        "Programming Language :: Python :: 2.7",
-        "Programming Language :: Python :: 3.4",
-        "Programming Language :: Python :: 3.5",
+        "Programming Language :: Python :: 3.10",
+        "Programming Language :: Python :: 3.11",
         "Intended Audience :: Developers",
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",